@@ -0,0 +1,117 @@
+/*
+ * Clientside computation of the dashboard's statistic cards.
+ *
+ * The statistics are derived from the records already held by the
+ * 'token-data-store' component, so updating the cards needs no server
+ * round-trip.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    stats: {
+        /**
+         * Calculates the statistic card values for the stored records.
+         *
+         * @param {Object<string, Array>} data - The token price columns from the
+         *     dcc.Store, each holding one value per record.
+         * @param {number} daysFilter - The number of days used for the average,
+         *     highest, and lowest prices (0 for all data).
+         * @param {Object} colors - The 'increase' and 'decrease' indicator colors.
+         * @returns {Array} The last update text, current, average, highest, and
+         *     lowest prices, and the price change indicators.
+         */
+        compute: function (data, daysFilter, colors) {
+            const na = "N/A";
+
+            if (!data || !data.price_gold || data.price_gold.length === 0) {
+                return [na, na, na, na, na, span("N/A")];
+            }
+
+            const datetimes = data.datetime;
+            const prices = data.price_gold;
+            // Records are sorted by time, so the last one is the latest
+            const last = prices.length - 1;
+            const lastUpdated = "Last updated: " + datetimes[last].slice(0, 19).replace("T", " ");
+            const currentPrice = formatGold(prices[last]);
+            const indicators = formatChangeIndicators(
+                data.price_change_abs[last], data.price_change_pct[last], colors
+            );
+
+            // Timestamps are naive UTC strings; parse them as UTC
+            const startTime = daysFilter
+                ? parseTime(datetimes[last]) - daysFilter * 24 * 60 * 60 * 1000
+                : -Infinity;
+
+            // Single pass over the filtered window for the range statistics
+            let min = Infinity;
+            let max = -Infinity;
+            let sum = 0;
+            let count = 0;
+            for (let i = last; i >= 0; i--) {
+                if (parseTime(datetimes[i]) < startTime) {
+                    break;
+                }
+                const price = prices[i];
+                if (price < min) min = price;
+                if (price > max) max = price;
+                sum += price;
+                count++;
+            }
+
+            if (count === 0) {
+                return [lastUpdated, currentPrice, na, na, na, indicators];
+            }
+
+            return [
+                lastUpdated,
+                currentPrice,
+                formatGold(Math.round(sum / count)),
+                formatGold(max),
+                formatGold(min),
+                indicators,
+            ];
+        },
+    },
+});
+
+function parseTime(datetime) {
+    return Date.parse(datetime.slice(0, 19) + "Z");
+}
+
+function formatGold(value) {
+    // Comma as thousands separator
+    return Math.round(value).toLocaleString("en-US");
+}
+
+function span(children, style) {
+    return {
+        namespace: "dash_html_components",
+        type: "Span",
+        props: { children: children, style: style || {} },
+    };
+}
+
+function formatChangeIndicators(absChange, pctChange, colors) {
+    if (absChange === null || absChange === undefined) {
+        return span("Change: N/A", { color: "gray" });
+    }
+
+    const isPositive = absChange >= 0;
+    // Use the configured colors based on the change direction
+    const color = isPositive ? colors.increase : colors.decrease;
+    const sign = isPositive ? "+" : "";
+    // The percentage is missing when the previous price is unknown
+    const pct = pctChange === null || pctChange === undefined
+        ? "N/A"
+        : sign + pctChange.toFixed(2) + "%";
+
+    return [
+        span(sign + formatGold(absChange) + " Gold", {
+            color: color,
+            fontWeight: "bold",
+            marginRight: "10px",
+        }),
+        span("(" + pct + ")", {
+            color: color,
+            fontStyle: "italic",
+        }),
+    ];
+}
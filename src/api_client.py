@@ -1,10 +1,51 @@
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import os
 import time
 import json
 from pathlib import Path
 
+# (connect, read) timeouts in seconds for every request to the Blizzard API
+REQUEST_TIMEOUT: tuple[float, float] = (3, 10)
+# Cached tokens are renewed this many seconds before they actually expire
+TOKEN_EXPIRY_MARGIN_SECONDS: int = 60
+
+
+def create_session(
+    pool_connections: int = 2, pool_maxsize: int = 4
+) -> requests.Session:
+    """
+    Creates an HTTP session with pooled keep-alive connections and a retry
+    strategy for transient server errors.
+
+    Args:
+        pool_connections: The number of hosts to keep connection pools for.
+        pool_maxsize: The maximum number of connections kept per host.
+
+    Returns:
+        The configured requests.Session.
+    """
+    # Configure retry strategy for transient server errors
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "POST"],
+    )
+
+    # Keep-alive connections are pooled and reused across requests
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry_strategy,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class BlizzardAPIClient:
     """
@@ -20,6 +61,7 @@ class BlizzardAPIClient:
         region: str,
         locale: str,
         token_cache_file: Path,
+        session: requests.Session | None = None,
     ):
         """
         Initializes the client with credentials and configuration.
@@ -30,6 +72,8 @@ class BlizzardAPIClient:
             region: The region identifier.
             locale: The locale for API requests.
             token_cache_file: Base path for the token cache file.
+            session: An HTTP session to send the requests with, which may be
+                shared between clients. A new session is created if omitted.
 
         Raises:
             ValueError: If client_id or client_secret are not provided.
@@ -47,26 +91,18 @@ class BlizzardAPIClient:
         self.token_cache_file: Path = (
             token_cache_file.parent / f"token_cache_{region}.json"
         )
+        # Ensure the directory for the cache file exists once, not on every save
+        self.token_cache_file.parent.mkdir(parents=True, exist_ok=True)
 
         self.oauth_url = "https://oauth.battle.net/token"
         self.api_base_url = f"https://{region}.api.blizzard.com"
         # Dynamic namespace is required for WoW Game Data APIs
         self.namespace = f"dynamic-{region}"
         self._access_token = None
+        # Absolute expiry timestamp of the access token held in memory
+        self._token_expiry: float = 0
 
-        # Configure retry strategy for transient server errors
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "POST"],
-        )
-
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-
-        self.session = requests.Session()
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
+        self.session = session if session is not None else create_session()
 
     def _load_token_cache(self) -> str | None:
         """
@@ -79,9 +115,11 @@ class BlizzardAPIClient:
             try:
                 with open(self.token_cache_file, "r") as f:
                     data = json.load(f)
-                    # Check if the token's expiry time is in the future
-                    if time.time() < data.get("expiry", 0):
+                    # Check if the token remains valid beyond the safety margin
+                    expiry = data.get("expiry", 0)
+                    if time.time() < expiry - TOKEN_EXPIRY_MARGIN_SECONDS:
                         self._access_token = data.get("access_token")
+                        self._token_expiry = expiry
                         return self._access_token
                     else:
                         # Token expired, attempt to delete the stale cache file
@@ -103,16 +141,19 @@ class BlizzardAPIClient:
             token: The new access token string.
             expiry: The token's time-to-live in seconds.
         """
-        # Ensure the directory for the cache file exists
-        self.token_cache_file.parent.mkdir(parents=True, exist_ok=True)
         data = {
             "access_token": token,
             # Calculate absolute expiry time
             "expiry": time.time() + expiry,
         }
-        with open(self.token_cache_file, "w") as f:
+        # Write to a temporary file and swap it in atomically, so a concurrent
+        # reader never sees a partially written cache
+        temp_file = self.token_cache_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
             json.dump(data, f)
+        os.replace(temp_file, self.token_cache_file)
         self._access_token = token
+        self._token_expiry = data["expiry"]
 
     def get_access_token(self) -> str:
         """
@@ -129,7 +170,14 @@ class BlizzardAPIClient:
                 network issues or an API error.
         """
 
-        # Check if token is already loaded
+        # Reuse the token held in memory while it is valid
+        if (
+            self._access_token
+            and time.time() < self._token_expiry - TOKEN_EXPIRY_MARGIN_SECONDS
+        ):
+            return self._access_token
+
+        # Check if a valid token is cached on disk
         cached_token = self._load_token_cache()
         if cached_token:
             return cached_token
@@ -139,7 +187,10 @@ class BlizzardAPIClient:
 
         try:
             response = self.session.post(
-                self.oauth_url, data=data, auth=(self.client_id, self.client_secret)
+                self.oauth_url,
+                data=data,
+                auth=(self.client_id, self.client_secret),
+                timeout=REQUEST_TIMEOUT,
             )
             response.raise_for_status()  # Raise HTTPError for bad responses
         except requests.exceptions.RequestException as e:
@@ -187,7 +238,9 @@ class BlizzardAPIClient:
         headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
-            response = self.session.get(url, params=params, headers=headers)
+            response = self.session.get(
+                url, params=params, headers=headers, timeout=REQUEST_TIMEOUT
+            )
             # Check for HTTP errors
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
@@ -1,8 +1,23 @@
+import logging
+import plotly.io as pio
 from dash import Dash
+from flask import Flask
 from pathlib import Path
 from flask_caching import Cache
 from layout import create_layout
 from callbacks import register_callbacks
+from config import LOG_LEVEL
+
+# Configure logging to display timestamp, level, and message
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+# Dash serializes layouts, callback responses and figures through Plotly's JSON
+# encoder; use orjson, which writes NumPy arrays natively, instead of the stdlib.
+pio.json.config.default_engine = "orjson"
 
 # Define the project root and assets directory for portable file referencing.
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -18,8 +33,21 @@ external_stylesheet = [
     },
 ]
 
+# Create the Flask server up front so Flask-Compress reads its settings when Dash
+# enables compression: Brotli first with a gzip fallback, skipping responses
+# too small to benefit.
+flask_server = Flask(__name__)
+flask_server.config.update(COMPRESS_ALGORITHM=["br", "gzip"], COMPRESS_MIN_SIZE=500)
+
 # Initialize the Dash app, explicitly defining the custom assets folder and stylesheets.
-app = Dash(__name__, assets_folder=ASSET_PATH, external_stylesheets=external_stylesheet)
+# Responses (layout, callbacks and assets) are compressed with Flask-Compress.
+app = Dash(
+    __name__,
+    server=flask_server,
+    assets_folder=ASSET_PATH,
+    external_stylesheets=external_stylesheet,
+    compress=True,
+)
 app.title = "WoW Token Price Dashboard"
 
 # Expose the underlying Flask server for WSGI deployment.
@@ -29,7 +57,8 @@ server = app.server
 # and reduce database load by caching data loaded from the DB.
 cache = Cache(app.server, config={"CACHE_TYPE": "SimpleCache"})
 
-# Load and assign the application's visual structure.
+# Build the application's visual structure once and serve the same component
+# tree on every page load.
 app.layout = create_layout()
 
 # Register interaction logic and pass the cache instance to the callback handlers.
@@ -1,8 +1,17 @@
-from dash import Input, Output, html
+from dash import ClientsideFunction, Input, Output, State, no_update
 import pandas as pd
 from data_handler import get_db_mtime, load_data
 from figures import create_token_line_plot
-from config import COLOR_INCREASE, COLOR_DECREASE
+from config import CACHE_TIMEOUT_MINUTES
+
+
+# Columns sent to the browser's dcc.Store, as read by assets/stats.js
+STORE_COLUMNS: list[str] = [
+    "datetime",
+    "price_gold",
+    "price_change_abs",
+    "price_change_pct",
+]
 
 
 def _filter_dataframe_by_days(df: pd.DataFrame, days_filter: int) -> pd.DataFrame:
@@ -29,39 +38,35 @@ def _filter_dataframe_by_days(df: pd.DataFrame, days_filter: int) -> pd.DataFram
     return df[df["datetime"] >= start_time]
 
 
-def _format_price_change_indicators(
-    latest_abs_change: float, latest_pct_change: float
-) -> list[html.Span] | html.Span:
+def _get_token_line_plot(df: pd.DataFrame, days_filter: int, cache) -> dict:
     """
-    Formats the absolute and percentage price change into colored HTML `Span` elements
-    for display in the dashboard's stat card.
+    Returns the line chart for the loaded data, reusing a previously built
+    figure when the data has not changed.
+
+    The highest record id and the number of records identify the loaded data,
+    so together with the day filter they form the cache key. Records are sorted
+    by time, so a backfilled record is not necessarily the last one. Interval
+    ticks that bring no new record are served from the cache without rebuilding
+    the figure.
 
     Args:
-        latest_abs_change: The latest absolute change in price.
-        latest_pct_change: The latest percentage change in price.
+        df: The token price data of the selected region.
+        days_filter: The number of days to display in the plot.
+        cache: The Flask-Caching instance for figure caching.
 
     Returns:
-        A list of `html.Span` objects or a single "N/A" `html.Span`.
+        The Plotly figure as a dictionary.
     """
-    if pd.isna(latest_abs_change) or latest_abs_change is None:
-        return html.Span("Change: N/A", style={"color": "gray"})
-
-    is_positive = latest_abs_change >= 0
-    # Use pre-configured colors based on the change direction
-    color = COLOR_INCREASE if is_positive else COLOR_DECREASE
-    sign = "+" if is_positive else ""
-
-    # Return a list of two spans for absolute and percentage change
-    return [
-        html.Span(
-            f"{sign}{round(latest_abs_change):,} Gold",
-            style={"color": color, "fontWeight": "bold", "marginRight": "10px"},
-        ),
-        html.Span(
-            f"({sign}{latest_pct_change:.2f}%)",
-            style={"color": color, "fontStyle": "italic"},
-        ),
-    ]
+    cache_key = f"token-line-plot:{df['id'].max()}:{len(df)}:{days_filter}"
+    figure = cache.get(cache_key)
+
+    if figure is None:
+        df_filtered = _filter_dataframe_by_days(df, days_filter)
+
+        figure = create_token_line_plot(df_filtered).to_plotly_json()
+        cache.set(cache_key, figure, timeout=60 * CACHE_TIMEOUT_MINUTES)
+
+    return figure
 
 
 def register_callbacks(app, cache):
@@ -73,66 +78,107 @@ def register_callbacks(app, cache):
         cache: The Flask-Caching instance for data caching.
     """
 
+    # Pause the auto-refresh interval while the browser tab is hidden. This runs
+    # in the browser, so hidden tabs cause no server traffic at all.
+    app.clientside_callback(
+        """
+        function(n_intervals, disabled) {
+            if (document.hidden === disabled) {
+                return window.dash_clientside.no_update;
+            }
+            return document.hidden;
+        }
+        """,
+        Output("interval-check", "disabled"),
+        Input("visibility-poll", "n_intervals"),
+        State("interval-check", "disabled"),
+    )
+
     @app.callback(
-        Output("token-data-store", "data"),
+        [
+            Output("token-data-store", "data"),
+            Output("token-data-version", "data"),
+        ],
         [
             Input("interval-check", "n_intervals"),
             Input("region-selector-dropdown", "value"),
         ],
+        State("token-data-version", "data"),
     )
-    def update_data_store(n_intervals, region):
+    def update_data_store(n_intervals, region, current_version):
         """
-        Loads data from the DB using the cache and stores it as a list of dictionaries
-        in the dcc.Store component for other callbacks to consume.
+        Loads data from the DB using the cache and stores it as a dictionary of
+        column lists in the dcc.Store component for the statistic cards.
 
-        The callback is triggered by a time interval or a region change.
+        The callback is triggered by a time interval or a region change. When
+        the browser already holds the current data of the region, nothing is
+        sent and the dependent callbacks do not fire.
 
         Args:
             n_intervals: The number of times the interval component has fired.
             region: The currently selected region identifier.
+            current_version: The version of the data currently in the store.
 
         Returns:
-            The DataFrame's records as a list of dicts.
+            The DataFrame's columns as a dict of lists and their version.
         """
         # Get the database modification time to use as a cache key
         mtime = get_db_mtime()
+
+        # Skip the update if no new record has been written since the last one
+        version = f"{region}:{mtime}"
+        if version == current_version:
+            return no_update, no_update
+
         # Load the data for the selected region, utilizing the cache
         df = load_data(mtime, cache, region)
 
-        # Convert the DataFrame to a format suitable for the dcc.Store component
-        return df.to_dict("records")
+        # Store only the columns used by the statistic cards, column by column, so
+        # the column names are sent once instead of once per record
+        data = df.reindex(columns=STORE_COLUMNS).to_dict("list")
+        return data, version
 
     @app.callback(
         Output("token-line-plot", "figure"),
-        [Input("token-data-store", "data"), Input("days-filter-dropdown", "value")],
+        [
+            Input("token-data-store", "modified_timestamp"),
+            Input("days-filter-dropdown", "value"),
+        ],
+        State("region-selector-dropdown", "value"),
     )
-    def update_graph(data, days_filter):
+    def update_graph(store_timestamp, days_filter, region):
         """
-        Reads data from the dcc.Store, applies the day filter, and generates
-        the Plotly line chart.
+        Applies the day filter to the region's data and generates the Plotly
+        line chart.
+
+        The callback fires whenever the dcc.Store is refreshed, but reads the
+        data from the server-side cache instead of the store, so the full
+        price history is never sent back from the browser. Only the
+        downsampled traces travel to the browser.
 
         Args:
-            data: The token price data as a list of dicts from the dcc.Store.
+            store_timestamp: The time the dcc.Store was last modified.
             days_filter: The number of days to display in the plot.
+            region: The currently selected region identifier.
 
         Returns:
-            The Plotly Figure object.
+            The Plotly figure as a dictionary.
         """
-        if not data:
+        df = load_data(get_db_mtime(), cache, region)
+
+        if df.empty:
             # Return a placeholder figure while waiting for data
             return {
                 "data": [],
                 "layout": {"title": {"text": "Waiting data...", "x": 0.5}},
             }
 
-        df = pd.DataFrame(data)
-        df["datetime"] = pd.to_datetime(df["datetime"])
-
-        df_filtered = _filter_dataframe_by_days(df, days_filter)
-
-        return create_token_line_plot(df_filtered)
+        return _get_token_line_plot(df, days_filter, cache)
 
-    @app.callback(
+    # Calculate the statistic cards in the browser from the stored records
+    # (see assets/stats.js), avoiding a server round-trip
+    app.clientside_callback(
+        ClientsideFunction(namespace="stats", function_name="compute"),
         [
             Output("last-updated-time", "children"),
             Output("current-price-value", "children"),
@@ -142,59 +188,5 @@ def register_callbacks(app, cache):
             Output("price_change_indicators", "children"),
         ],
         [Input("token-data-store", "data"), Input("days-filter-dropdown", "value")],
+        State("change-colors", "data"),
     )
-    def update_stats(data, days_filter):
-        """
-        Calculates and updates the main statistical indicators based on the filtered dataset.
-
-        Args:
-            data: The token price data as a list of dicts from the dcc.Store.
-            days_filter: The number of days to use for average/min/max calculation.
-
-        Returns:
-            A tuple of strings/html.Span objects for the statistical output components.
-        """
-        na_values = ("N/A", "N/A", "N/A", "N/A", "N/A", html.Span("N/A"))
-
-        if not data:
-            return na_values
-
-        df = pd.DataFrame(data)
-        df["datetime"] = pd.to_datetime(df["datetime"])
-
-        if df.empty:
-            return na_values
-
-        # Get latest record for current price, last update time, and indicators
-        last_row = df.iloc[-1]
-        last_updated_text = (
-            f"Last updated: {last_row['datetime'].strftime('%Y-%m-%d %H:%M:%S')}"
-        )
-        # Format current price with comma as thousands separator
-        current_price = f"{last_row['price_gold']:,}"
-
-        # Format price change indicators using the helper function
-        indicators = _format_price_change_indicators(
-            last_row.get("price_change_abs"), last_row.get("price_change_pct")
-        )
-
-        # Filter the DataFrame for average, min, and max calculations
-        df_filtered = _filter_dataframe_by_days(df, days_filter)
-
-        if df_filtered.empty:
-            # If filtering results in an empty set, return current data but N/A for range stats
-            return (last_updated_text, current_price, "N/A", "N/A", "N/A", indicators)
-
-        # Calculate and format filtered statistics
-        avg_price = f"{round(df_filtered['price_gold'].mean()):,}"
-        max_price = f"{df_filtered['price_gold'].max():,}"
-        min_price = f"{df_filtered['price_gold'].min():,}"
-
-        return (
-            last_updated_text,
-            current_price,
-            avg_price,
-            max_price,
-            min_price,
-            indicators,
-        )
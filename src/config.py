@@ -13,6 +13,8 @@ CLIENT_ID: str = os.getenv("CLIENT_ID")
 CLIENT_SECRET: str = os.getenv("CLIENT_SECRET")
 DEFAULT_REGION: str = os.getenv("REGION", "eu")
 LOCALE: str = "en_US"
+# Minimum level of the log messages written by the worker and the dashboard
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
 
 # File Paths
 # Cache file for Blizzard OAuth tokens
@@ -23,11 +25,27 @@ DB_PATH: Path = PROJECT_ROOT / "data" / "wow_token_prices.db"
 # Constants
 # Conversion factor
 COPPER_PER_GOLD: int = 10000
+# Format of the UTC timestamps stored in the database
+DATETIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+# Interval between price collections for each region
+COLLECTION_INTERVAL_MINUTES: int = 20
+# Maximum number of Blizzard API fetches in flight at the same time. The API
+# allows 100 requests per second, so at roughly 100 ms per request 10 fetches
+# in flight stay within the quota
+MAX_CONCURRENT_REQUESTS: int = 10
+
+# Interval between database maintenance runs (planner statistics, WAL checkpoint)
+DB_MAINTENANCE_MINUTES: int = 15
+# WAL size, in pages, above which maintenance truncates the WAL file
+WAL_TRUNCATE_FRAMES: int = 1000
 
 # Data caching duration for the Dash application
 CACHE_TIMEOUT_MINUTES: int = 19
 # Number of days used for the Exponential Moving Average calculation
 EMA_SPAN_DAYS: int = 7
+# Maximum number of points drawn per line in the price chart
+PLOT_MAX_POINTS: int = 2000
 
 # Visualization Colors
 COLOR_INCREASE: str = "#17B897"  # Green for positive change
@@ -40,6 +58,8 @@ DAYS_OPTIONS: list[dict] = [
     {"label": "14 Days", "value": 14},
 ]
 DEFAULT_DAYS_FILTER: int = 3
+# Number of days loaded from the database, enough to cover every days option
+LOAD_WINDOW_DAYS: int = max(option["value"] for option in DAYS_OPTIONS)
 
 REGION_OPTIONS: list[dict] = [
     {"label": "Europe (EU)", "value": "eu"},
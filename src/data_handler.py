@@ -1,9 +1,28 @@
+import functools
+import logging
 import pandas as pd
 import sqlite3
 import os
+import threading
 import time
-from config import DB_PATH, CACHE_TIMEOUT_MINUTES
-from data_manager import get_db_connection
+from config import DB_PATH, CACHE_TIMEOUT_MINUTES, DATETIME_FORMAT, LOAD_WINDOW_DAYS
+from data_manager import get_latest_datetime, load_after, load_range
+
+logger = logging.getLogger(__name__)
+
+# Columns of the loaded price data
+DATA_COLUMNS: list[str] = [
+    "id",
+    "datetime",
+    "price_gold",
+    "ema",
+    "price_change_abs",
+    "price_change_pct",
+]
+
+# Latest loaded window of each region, extended with new records on reload
+_history: dict[str, pd.DataFrame] = {}
+_history_lock = threading.Lock()
 
 
 def get_db_mtime() -> float:
@@ -11,7 +30,8 @@ def get_db_mtime() -> float:
     Returns the modification time of the SQLite database file.
 
     This time is used as a cache key to force a cache reload whenever the
-    underlying database file is updated by the worker.
+    underlying database file is updated by the worker. In WAL mode new records
+    land in the '-wal' file until a checkpoint, so its time is considered too.
 
     Returns:
         float: The time of the last modification,
@@ -19,17 +39,105 @@ def get_db_mtime() -> float:
     """
     # Check if the database file exists
     if DB_PATH.exists():
-        # Return the time of the last modification
+        wal_path = DB_PATH.with_name(DB_PATH.name + "-wal")
+        # Return the time of the last modification of either file
+        if wal_path.exists():
+            return max(os.path.getmtime(DB_PATH), os.path.getmtime(wal_path))
         return os.path.getmtime(DB_PATH)
     # If the database file is not found, return the current time
     return time.time()
 
 
+def _load_from_db(mtime: float, region: str) -> pd.DataFrame:
+    """
+    Internal helper to load the dashboard window of a region from the database.
+
+    The first load reads the whole window. Later loads only read the records
+    inserted since, append them to the previously loaded window and drop the
+    records that fell out of it. If a new record predates the loaded ones,
+    the whole window is read again, since the metrics of the records after
+    it were derived again.
+
+    Args:
+        mtime: Modification time of the database file, only used as part of
+            the cache key.
+        region: The region for which the data is being loaded.
+
+    Returns:
+        The region's records, or an empty DataFrame if none are available.
+    """
+    # Check if the database file exists before attempting connection.
+    if not DB_PATH.exists():
+        # Return an empty DataFrame with expected columns if the DB is missing
+        return pd.DataFrame(columns=DATA_COLUMNS)
+
+    try:
+        with _history_lock:
+            history = _history.get(region)
+
+            if history is not None and not history.empty:
+                new_records = load_after(region, int(history["id"].max()))
+                if new_records.empty:
+                    return history
+
+                # Backfilled records predating the loaded ones also update the
+                # metrics of the records after them, so reload the whole window
+                if new_records["datetime"].min() < history["datetime"].iloc[-1]:
+                    history = None
+                else:
+                    history = pd.concat([history, new_records], ignore_index=True)
+
+                    # Keep the window displayed by the dashboard
+                    start = history["datetime"].iloc[-1] - pd.Timedelta(
+                        days=LOAD_WINDOW_DAYS
+                    )
+                    history = history[history["datetime"] >= start].reset_index(
+                        drop=True
+                    )
+
+            if history is None or history.empty:
+                latest = get_latest_datetime(region)
+                if latest is None:
+                    return pd.DataFrame(columns=DATA_COLUMNS)
+
+                # Bound the query to the window displayed by the dashboard
+                start = pd.Timestamp(latest) - pd.Timedelta(days=LOAD_WINDOW_DAYS)
+                history = load_range(region, start.strftime(DATETIME_FORMAT), latest)
+
+            _history[region] = history
+            return history
+
+    except sqlite3.Error as e:
+        # Handle potential SQLite errors during connection or query execution
+        logger.error(f"SQLite Error during data loading: {e}")
+        # Return an empty DataFrame with the expected columns in case of error
+        return pd.DataFrame()
+
+
+@functools.cache
+def _memoized_loader(cache):
+    """
+    Internal helper wrapping the database loader with the cache's memoization
+    once per cache instance, instead of on every call.
+
+    Args:
+        cache: The Dash application's cache object.
+
+    Returns:
+        The memoized loader function.
+    """
+    # If the DB file changes, 'mtime' changes, and the cache is invalidated.
+    return cache.memoize(timeout=60 * CACHE_TIMEOUT_MINUTES)(_load_from_db)
+
+
 def load_data(mtime: float, cache, region: str) -> pd.DataFrame:
     """
     Load and preprocess the WoW token price data for a specific region from
     the SQLite database, utilizing a cache.
 
+    Only the last `LOAD_WINDOW_DAYS` days before the region's most recent
+    record are loaded, which covers every option of the days filter.
+
     The 'mtime' parameter forces cache invalidation when the underlying database file changes.
 
     Parameters
@@ -44,47 +152,8 @@ def load_data(mtime: float, cache, region: str) -> pd.DataFrame:
     Returns
     -------
     pandas.DataFrame
-        A sorted DataFrame containing 'datetime', 'price_gold', and
+        A sorted DataFrame containing 'id', 'datetime', 'price_gold', and
         derived metrics.
     """
-
-    # Decorator to cache the result of the function call based on its arguments.
-    # If the DB file changes, 'mtime' changes, and the cache is invalidated.
-    @cache.memoize(timeout=60 * CACHE_TIMEOUT_MINUTES)
-    def cached_load(mtime, region):
-        # Check if the database file exists before attempting connection.
-        if not DB_PATH.exists():
-            # Return an empty DataFrame with expected columns if the DB is missing
-            return pd.DataFrame(
-                columns=[
-                    "datetime",
-                    "price_gold",
-                    "ema",
-                    "price_change_abs",
-                    "price_change_pct",
-                ]
-            )
-
-        try:
-            # Connect to the SQLite database
-            with get_db_connection() as conn:
-                # Select all required columns for the specific region, ordered by time
-                sql_query = "SELECT datetime, price_gold, ema, price_change_abs, price_change_pct FROM token_prices WHERE region = ? ORDER BY datetime ASC"
-                df = pd.read_sql_query(sql_query, conn, params=(region,))
-
-            if df.empty:
-                return df
-
-            # Convert the 'datetime' column to the proper pandas datetime type
-            df["datetime"] = pd.to_datetime(df["datetime"])
-
-            return df
-
-        except sqlite3.Error as e:
-            # Handle potential SQLite errors during connection or query execution
-            print(f"SQLite Error during data loading: {e}")
-            # Return an empty DataFrame with the expected columns in case of error
-            return pd.DataFrame()
-
-    # Call the decorated function with the modification time to trigger caching
-    return cached_load(mtime, region)
+    # Call the memoized loader with the modification time to trigger caching
+    return _memoized_loader(cache)(mtime, region)
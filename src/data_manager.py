@@ -1,169 +1,497 @@
-from datetime import datetime, timezone
-from typing import Optional, Tuple
+import logging
 import sqlite3
+import threading
+from contextlib import closing
+from functools import cache
+from itertools import chain
 from sqlite3 import Connection, Cursor
-from config import DB_PATH, COPPER_PER_GOLD, EMA_SPAN_DAYS
+import pandas as pd
+from config import (
+    DB_PATH,
+    COPPER_PER_GOLD,
+    DATETIME_FORMAT,
+    EMA_SPAN_DAYS,
+    WAL_TRUNCATE_FRAMES,
+)
+
+__all__ = [
+    "bulk_save_prices",
+    "get_latest_datetime",
+    "initialize_db",
+    "load_after",
+    "load_range",
+    "optimize_db",
+    "save_price",
+    "save_prices",
+]
+
+logger = logging.getLogger(__name__)
 
 # Ensure the 'data' directory exists within the project root before initializing the DB.
 DB_PATH.parent.mkdir(exist_ok=True)
 
+# Version of the database schema, stored in SQLite's 'user_version' PRAGMA
+SCHEMA_VERSION: int = 5
+
+# Smoothing factor based on the configured EMA span in days, kept as an integer
+# fraction so the EMA is calculated with integer arithmetic only
+_EMA_ALPHA_NUM: int = 2
+_EMA_ALPHA_DEN: int = EMA_SPAN_DAYS + 1
+
+# Derives the price changes and the EMA of a record, referenced as '{row}',
+# from the region's previous record by time (ties broken by id). The first
+# record of a region seeds the EMA with its own price. DDL does not accept
+# bound parameters, so the EMA factors are formatted into the SQL.
+_METRICS_SQL = f"""
+    (
+        SELECT
+            COALESCE(
+                ({{row}}.price_gold * {_EMA_ALPHA_NUM}
+                 + COALESCE(prev.ema, prev.price_gold)
+                 * {_EMA_ALPHA_DEN - _EMA_ALPHA_NUM}) / {_EMA_ALPHA_DEN},
+                {{row}}.price_gold
+            ),
+            COALESCE({{row}}.price_gold - prev.price_gold, 0),
+            -- Hundredths of a percent of the previous price
+            COALESCE(
+                ({{row}}.price_gold - prev.price_gold) * 10000 / prev.price_gold, 0
+            )
+        FROM (SELECT 1)
+        LEFT JOIN (
+            SELECT price_gold, ema
+            FROM token_prices
+            WHERE region = {{row}}.region
+              AND (datetime, id) < ({{row}}.datetime, {{row}}.id)
+            ORDER BY datetime DESC, id DESC
+            LIMIT 1
+        ) AS prev
+    )
+"""
+
+# Derives the metrics of every record inserted without an EMA, inside the
+# inserting transaction
+_CREATE_METRICS_TRIGGER_SQL = f"""
+    CREATE TRIGGER trg_derive_metrics
+    AFTER INSERT ON token_prices
+    WHEN NEW.ema IS NULL
+    BEGIN
+        UPDATE token_prices
+        SET (ema, price_change_abs, price_change_pct) = {_METRICS_SQL.format(row="NEW")}
+        WHERE id = NEW.id;
+    END
+"""
+
+# Derives the metrics of an existing record again, e.g. after an older record
+# was inserted before it
+_RECOMPUTE_METRICS_SQL = f"""
+    UPDATE token_prices AS cur
+    SET (ema, price_change_abs, price_change_pct) = {_METRICS_SQL.format(row="cur")}
+    WHERE id = ?
+"""
+
+# Inserts a record with the UTC timestamp generated by SQLite as
+# 'YYYY-MM-DD HH:MM:SS'. The timestamp is given explicitly because tables
+# created before the column default was added have none. The metrics are
+# derived by the trigger.
+_INSERT_PRICE_SQL = """
+    INSERT INTO token_prices (datetime, price_gold, region)
+    VALUES (CURRENT_TIMESTAMP, ?, ?)
+"""
+
+# Maximum number of records inserted by a single multi-row INSERT statement,
+# keeping the bound parameters (3 per row) well below SQLite's variable limit
+_BULK_CHUNK_ROWS = 250
+
+
+@cache
+def _insert_records_sql(n_rows: int) -> str:
+    """
+    Builds a multi-row INSERT statement for records with a 'YYYY-MM-DD HH:MM:SS'
+    timestamp, leaving the metrics to the trigger.
+
+    The SQL text is cached per row count, so the sqlite3 statement cache can
+    reuse the prepared statement across chunks of the same size.
+
+    Args:
+        n_rows: The number of records inserted by the statement.
+
+    Returns:
+        The INSERT statement with one VALUES tuple per record.
+    """
+    return "INSERT INTO token_prices (datetime, price_gold, region) VALUES " + ",".join(
+        ["(?, ?, ?)"] * n_rows
+    )
+
+
+# Holds the persistent connection of each thread
+_local = threading.local()
+
 
-def get_db_connection() -> Connection:
+def _get_conn() -> Connection:
     """
-    Establishes a connection to the SQLite database with a defined timeout.
+    Returns the persistent read-write connection for the current thread,
+    opening it on first use. Only the worker's long-lived threads write, so
+    the number of these connections stays bounded by its thread count.
 
-    Enables Write-Ahead Logging mode to improve concurrency and
-    performance for mixed read/write operations.
+    Reusing a single connection avoids the setup and PRAGMA cost of a new
+    connection on every write.
+
+    The connection runs in autocommit mode, so each statement is committed
+    as soon as it executes.
 
     Returns:
-        sqlite3.Connection: The active database connection object.
+        sqlite3.Connection: The cached database connection object.
     """
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = getattr(_local, "conn", None)
 
-    # Optimize performance and concurrency using WAL mode
-    conn.execute("PRAGMA journal_mode=WAL;")
+    if conn is None:
+        conn = sqlite3.connect(
+            DB_PATH, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        # Optimize performance and concurrency using WAL mode
+        conn.execute("PRAGMA journal_mode=WAL;")
+        # In WAL mode, NORMAL only syncs at checkpoints and stays crash-safe, so
+        # commits no longer wait for an fsync
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        _local.conn = conn
 
     return conn
 
 
+def _read_conn() -> closing[Connection]:
+    """
+    Opens a short-lived read-only connection, closed when its context exits.
+
+    The dashboard's server may handle every request on a new thread, so reads
+    use their own connection instead of a per-thread one that would stay open
+    after the thread ends.
+
+    Returns:
+        The database connection wrapped in a closing context manager.
+    """
+    return closing(
+        sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True, timeout=30.0)
+    )
+
+
 def initialize_db() -> None:
     """
     Initializes the SQLite database schema for storing token prices.
 
+    The schema is only inspected and migrated when the database's
+    'user_version' is older than `SCHEMA_VERSION`, so steady-state startups
+    skip the migration entirely.
+    """
+    conn = _get_conn()
+
+    (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+    if user_version < SCHEMA_VERSION:
+        # Apply the schema changes and the version bump atomically
+        with conn:
+            conn.execute("BEGIN")
+            _migrate_schema(conn.cursor())
+
+
+def _migrate_schema(cursor: Cursor) -> None:
+    """
+    Internal helper to bring the database schema up to `SCHEMA_VERSION`.
+
     - Creates the 'token_prices' table if it does not exist.
     - Checks for and adds derived metric columns ('ema', 'price_change_abs',
        'price_change_pct') to support schema evolution.
-    - Creates a composite index for efficient querying by region and date.
-    """
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    - Rebuilds the table if 'price_change_pct' is still stored as a REAL
+       percentage, converting it to INTEGER hundredths of a percent.
+    - Replaces the original region/date index with a covering index, so the
+       latest price and EMA of a region are read from the index alone.
+    - (Re)creates the trigger deriving the metrics of newly inserted records
+       from the previous record by time.
 
-        # Base Table Creation
+    Args:
+        cursor: The active database cursor.
+    """
+    # Base Table Creation
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS token_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            price_gold INTEGER NOT NULL,
+            region TEXT NOT NULL
+        )
+    """)
+
+    # Check and add missing columns dynamically
+    cursor.execute("PRAGMA table_info(token_prices)")
+    existing_columns = {info[1]: info[2] for info in cursor.fetchall()}
+
+    # Columns for derived metrics
+    new_columns = {
+        "ema": "INTEGER",
+        "price_change_abs": "INTEGER",
+        # Hundredths of a percent
+        "price_change_pct": "INTEGER",
+    }
+
+    for col_name, col_type in new_columns.items():
+        if col_name not in existing_columns:
+            cursor.execute(f"ALTER TABLE token_prices ADD COLUMN {col_name} {col_type}")
+
+    # SQLite cannot change a column's type in place, so older tables holding
+    # REAL percentages are copied into a new table with the INTEGER column
+    if existing_columns.get("price_change_pct") == "REAL":
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS token_prices (
+            CREATE TABLE token_prices_new (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                datetime TEXT NOT NULL,
+                datetime TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 price_gold INTEGER NOT NULL,
-                region TEXT NOT NULL
+                region TEXT NOT NULL,
+                ema INTEGER,
+                price_change_abs INTEGER,
+                price_change_pct INTEGER
             )
         """)
+        cursor.execute("""
+            INSERT INTO token_prices_new
+            SELECT id, datetime, price_gold, region, ema, price_change_abs,
+                   CAST(ROUND(price_change_pct * 100) AS INTEGER)
+            FROM token_prices
+        """)
+        # Dropping the old table also drops its indexes, which are recreated below
+        cursor.execute("DROP TABLE token_prices")
+        cursor.execute("ALTER TABLE token_prices_new RENAME TO token_prices")
 
-        # Check and add missing columns dynamically
-        cursor.execute("PRAGMA table_info(token_prices)")
-        existing_columns = [info[1] for info in cursor.fetchall()]
-
-        # Columns for derived metrics
-        new_columns = {
-            "ema": "INTEGER",
-            "price_change_abs": "INTEGER",
-            "price_change_pct": "REAL",
-        }
-
-        for col_name, col_type in new_columns.items():
-            if col_name not in existing_columns:
-                cursor.execute(
-                    f"ALTER TABLE token_prices ADD COLUMN {col_name} {col_type}"
-                )
+    # Optimize sorting by date within a specific region, which is the primary query
+    # pattern. Including the price and EMA lets the latest-record lookups skip the
+    # table entirely.
+    cursor.execute("DROP INDEX IF EXISTS idx_region_date")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_region_date_cover
+        ON token_prices(region, datetime DESC, price_gold, ema)
+    """)
 
-        # Optimize sorting by date within a specific region, which is the primary query pattern
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_region_date ON token_prices(region, datetime)"
-        )
+    # Recreate the trigger so it always uses the current EMA factors
+    cursor.execute("DROP TRIGGER IF EXISTS trg_derive_metrics")
+    cursor.execute(_CREATE_METRICS_TRIGGER_SQL)
 
-        conn.commit()
+    # PRAGMA statements do not accept bound parameters
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 
-def _get_last_record(
-    cursor: Cursor, region: str
-) -> Optional[Tuple[int, Optional[int]]]:
+def optimize_db() -> None:
     """
-    Internal helper to fetch the most recent price and EMA for a specific region.
+    Performs periodic maintenance on the database for long-running processes.
 
-    Used by `save_price` to calculate price changes and the new EMA value.
+    - Runs 'PRAGMA optimize' so the query planner statistics for the
+      region/date index stay current.
+    - Checkpoints the WAL and truncates the file once it has grown past
+      `WAL_TRUNCATE_FRAMES` pages, bounding the WAL that readers must scan.
+    """
+    try:
+        conn = _get_conn()
+        conn.execute("PRAGMA optimize")
 
-    Args:
-        cursor: The active database cursor.
-        region: The region identifier.
+        # A passive checkpoint never blocks and reports the WAL size in pages
+        _, wal_frames, _ = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        if wal_frames > WAL_TRUNCATE_FRAMES:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-    Returns:
-        A tuple containing (price_gold, ema) if a record exists, otherwise None.
-    """
-    cursor.execute(
-        """SELECT price_gold, ema
-           FROM token_prices
-           WHERE region = ?
-           ORDER BY datetime DESC LIMIT 1""",
-        (region,),
-    )
-    return cursor.fetchone()
+    except sqlite3.Error as e:
+        # Log the error for debugging without stopping the worker
+        logger.error(f"Database maintenance failed: {e}")
 
 
 def save_price(price_copper: int, region: str) -> None:
     """
-    Calculates metrics and saves the current WoW Token price
-    to the database with a UTC timestamp.
-
-    - Converts raw copper value to gold.
-    - Fetches the previous record to calculate price changes.
-    - Calculates the new Exponential Moving Average (EMA).
-    - Inserts the fully calculated record.
+    Saves the current WoW Token price of a region to the database with a UTC
+    timestamp generated by SQLite.
 
     Args:
         price_copper: The WoW Token price in copper as fetched from the API.
         region: The region identifier for the saved price.
     """
+    save_prices([(price_copper, region)])
+
+
+def save_prices(prices: list[tuple[int, str]]) -> None:
+    """
+    Saves the current WoW Token prices of several regions to the database
+    with a UTC timestamp generated by SQLite.
+
+    - Converts raw copper values to gold.
+    - Inserts all records within a single transaction.
+    - The price changes and the EMA are derived by the database trigger when
+      each record is inserted.
+
+    Args:
+        prices: A list of (price_copper, region) tuples, with the prices as
+            fetched from the API.
+    """
+    if not prices:
+        return
+
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            # Record the current time in UTC for consistency
-            now_utc = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-            # Convert the copper price to gold
-            current_gold = price_copper // COPPER_PER_GOLD
-
-            # Retrieve previous data for comparison and EMA calculation
-            last_record = _get_last_record(cursor, region)
-
-            if last_record:
-                last_price, last_ema = last_record
-
-                # Calculate Price Movement
-                change_abs = current_gold - last_price
-                # Calculate percentage change based on the previous price
-                change_pct = (change_abs / last_price) * 100
-
-                # EMA Calculation
-                # The seed for the EMA is the first recorded price if no previous EMA exists
-                prev_ema = last_ema if last_ema is not None else last_price
-
-                # Smoothing factor based on the configured EMA span in days
-                alpha = 2 / (EMA_SPAN_DAYS + 1)
-                # The EMA formula
-                current_ema = (current_gold * alpha) + (prev_ema * (1 - alpha))
-
-            else:
-                # First record for this region; initialize changes to zero and EMA to the current price
-                change_abs = 0
-                change_pct = 0.0
-                current_ema = current_gold
-
-            # Insert the new record with all calculated metrics
-            cursor.execute(
-                """INSERT INTO token_prices
-                (datetime, price_gold, region, ema, price_change_abs, price_change_pct)
-                VALUES(?, ?, ?, ?, ?, ?)""",
-                (
-                    now_utc,
-                    current_gold,
-                    region,
-                    int(current_ema),
-                    change_abs,
-                    change_pct,
-                ),
+        conn = _get_conn()
+
+        # Commit all rows at once; the context manager rolls back on failure
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                _INSERT_PRICE_SQL,
+                # Convert the copper prices to gold
+                [
+                    (price_copper // COPPER_PER_GOLD, region)
+                    for price_copper, region in prices
+                ],
             )
 
-            conn.commit()
-
     except Exception as e:
         # Log the error for debugging without stopping the worker
-        print(f"ERROR: Failed saving in the database: {e}")
+        logger.error(f"Failed saving in the database: {e}")
+
+
+def bulk_save_prices(rows: list[tuple[str, int, str]]) -> None:
+    """
+    Saves many WoW Token prices at once, e.g. when backfilling historical data.
+
+    - Converts raw copper values to gold.
+    - Inserts all records in chronological order within a single transaction,
+      using multi-row INSERT statements.
+    - The price changes and the EMA are derived by the database trigger from
+      the previous stored record of each region by time.
+    - Records stored before this call that are newer than the earliest
+      inserted record of their region have their metrics derived again, in
+      chronological order, so they build on the inserted records.
+
+    Args:
+        rows: A list of (datetime, price_copper, region) tuples, where datetime
+            is a UTC 'YYYY-MM-DD HH:MM:SS' string.
+    """
+    if not rows:
+        return
+
+    try:
+        conn = _get_conn()
+
+        # Convert the copper prices to gold, ordering the records by time so
+        # each one builds on its predecessor
+        records = sorted(
+            (
+                (datetime, price_copper // COPPER_PER_GOLD, region)
+                for datetime, price_copper, region in rows
+            ),
+            key=lambda record: record[0],
+        )
+
+        # Earliest inserted record of each region
+        earliest: dict[str, str] = {}
+        for datetime, _, region in records:
+            earliest.setdefault(region, datetime)
+
+        # Commit all rows at once; the context manager rolls back on failure
+        with conn:
+            conn.execute("BEGIN")
+
+            # Regions whose stored records continue after the inserted ones
+            stale: list[tuple[str, str]] = []
+            for region, start in earliest.items():
+                (latest,) = conn.execute(
+                    "SELECT MAX(datetime) FROM token_prices WHERE region = ?", (region,)
+                ).fetchone()
+                if latest is not None and latest > start:
+                    stale.append((region, start))
+
+            # Insert the records in chunks of multi-row INSERT statements
+            for start in range(0, len(records), _BULK_CHUNK_ROWS):
+                chunk = records[start : start + _BULK_CHUNK_ROWS]
+                conn.execute(
+                    _insert_records_sql(len(chunk)), list(chain.from_iterable(chunk))
+                )
+
+            # Derive the metrics of the following records again, one after the
+            # other, so each builds on its updated predecessor
+            for region, start in stale:
+                following = conn.execute(
+                    """SELECT id FROM token_prices
+                       WHERE region = ? AND datetime > ?
+                       ORDER BY datetime, id""",
+                    (region, start),
+                ).fetchall()
+                conn.executemany(_RECOMPUTE_METRICS_SQL, following)
+
+    except Exception as e:
+        # Log the error for debugging without stopping the caller
+        logger.error(f"Failed saving in the database: {e}")
+
+
+def get_latest_datetime(region: str) -> str | None:
+    """
+    Returns the timestamp of the most recent record for a specific region.
+
+    Args:
+        region: The region identifier.
+
+    Returns:
+        The UTC timestamp string, or None if the region has no records.
+    """
+    with _read_conn() as conn:
+        return conn.execute(
+            "SELECT MAX(datetime) FROM token_prices WHERE region = ?", (region,)
+        ).fetchone()[0]
+
+
+def load_range(region: str, start: str, end: str) -> pd.DataFrame:
+    """
+    Loads the records of a specific region within a time range.
+
+    The range is applied in SQL, so SQLite only scans the matching slice of the
+    region/date index instead of the region's whole history. The stored
+    'price_change_pct' hundredths are converted back to a percentage.
+
+    Args:
+        region: The region identifier.
+        start: The inclusive lower bound as a UTC 'YYYY-MM-DD HH:MM:SS' string.
+        end: The inclusive upper bound as a UTC 'YYYY-MM-DD HH:MM:SS' string.
+
+    Returns:
+        A DataFrame sorted by time containing 'id', 'datetime', 'price_gold',
+        and derived metrics.
+    """
+    with _read_conn() as conn:
+        return pd.read_sql_query(
+            """SELECT id, datetime, price_gold, ema, price_change_abs,
+                      price_change_pct / 100.0 AS price_change_pct
+               FROM token_prices
+               WHERE region = ? AND datetime BETWEEN ? AND ?
+               ORDER BY datetime ASC""",
+            conn,
+            params=(region, start, end),
+            # Parse the 'datetime' column into the proper pandas datetime type
+            parse_dates={"datetime": DATETIME_FORMAT},
+        )
+
+
+def load_after(region: str, last_id: int) -> pd.DataFrame:
+    """
+    Loads the records of a specific region inserted after a known record.
+
+    The lookup is a range scan of the primary key, so its cost depends only on
+    the number of new records.
+
+    Args:
+        region: The region identifier.
+        last_id: The id of the latest record already loaded.
+
+    Returns:
+        A DataFrame sorted by time with the same columns as `load_range`.
+    """
+    with _read_conn() as conn:
+        return pd.read_sql_query(
+            """SELECT id, datetime, price_gold, ema, price_change_abs,
+                      price_change_pct / 100.0 AS price_change_pct
+               FROM token_prices
+               WHERE id > ? AND region = ?
+               ORDER BY datetime ASC""",
+            conn,
+            params=(last_id, region),
+            # Parse the 'datetime' column into the proper pandas datetime type
+            parse_dates={"datetime": DATETIME_FORMAT},
+        )
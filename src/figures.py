@@ -1,5 +1,105 @@
+from types import MappingProxyType
+
+import numpy as np
 import plotly.graph_objects as go
 import pandas as pd
+from config import PLOT_MAX_POINTS
+
+
+# Trace and layout settings are built once at import time and shared by every
+# render instead of being rebuilt on each call.
+_ACTUAL_TRACE_KW = MappingProxyType(
+    dict(
+        mode="lines",
+        line=dict(color="#17B897", width=2, dash="solid"),
+        name="Actual Price",
+        # Custom hover text format
+        hovertemplate="Date: %{x|%Y-%m-%d %H:%M:%S}<br>Price: %{y} Gold<extra></extra>",
+    )
+)
+
+_EMA_TRACE_KW = MappingProxyType(
+    dict(
+        mode="lines",
+        line=dict(color="#FF6347", width=2, dash="dash"),
+        name="Exponential Moving Average (7 days)",
+        # Custom hover text format
+        hovertemplate=(
+            "Date: %{x|%Y-%m-%d %H:%M:%S}<br>EMA: %{y} Gold<extra>7-Day EMA</extra>"
+        ),
+    )
+)
+
+_LAYOUT_KW = MappingProxyType(
+    dict(
+        title={"text": "WoW Token Price Over Time", "x": 0.05, "xanchor": "left"},
+        xaxis_title="Date",
+        yaxis_title="Price (Gold)",
+        # Prevent zooming to keep the display clean
+        xaxis_fixedrange=True,
+        yaxis_fixedrange=True,
+        # Display all traces' data when hovering over a single point on the x-axis
+        hovermode="x unified",
+        margin=dict(l=40, r=20, t=50, b=40),
+        # Set background to white for a clean look
+        plot_bgcolor="#ffffff",
+        paper_bgcolor="#ffffff",
+        font={"color": "#4b5563"},
+        # Horizontal legend at the top right
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+)
+
+
+def _downsample(df: pd.DataFrame, n_target: int = PLOT_MAX_POINTS) -> pd.DataFrame:
+    """
+    Reduces the DataFrame to at most 'n_target' rows using the
+    Largest-Triangle-Three-Buckets (LTTB) algorithm on the price series.
+
+    LTTB keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with its neighbours, which preserves the
+    visual shape of the line (peaks and dips) far better than plain decimation.
+
+    Args:
+        df: A DataFrame with 'datetime' and 'price_gold' columns, sorted by time.
+        n_target: The maximum number of rows to keep.
+
+    Returns:
+        The downsampled DataFrame, or the input unchanged if it is small enough.
+    """
+    n_rows = len(df)
+    if n_target < 3 or n_rows <= n_target:
+        return df
+
+    # Work on seconds relative to the first point to keep the areas well scaled
+    x = df["datetime"].to_numpy(dtype="datetime64[s]").astype(np.int64).astype(float)
+    x -= x[0]
+    y = df["price_gold"].to_numpy(dtype=float)
+
+    # Every bucket except the fixed first and last points holds this many rows
+    bucket_size = (n_rows - 2) / (n_target - 2)
+    selected = np.empty(n_target, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n_rows - 1
+
+    previous = 0
+    for bucket in range(n_target - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # The average of the next bucket acts as the triangle's third vertex
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n_rows)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+
+    return df.iloc[selected]
 
 
 def create_token_line_plot(df: pd.DataFrame) -> go.Figure:
@@ -7,6 +107,9 @@ def create_token_line_plot(df: pd.DataFrame) -> go.Figure:
     Generates a Plotly line chart displaying the actual WoW token price and
     its Exponential Moving Average over time.
 
+    The traces are rendered with WebGL, and large series are downsampled
+    before the traces are built.
+
     Args:
         df: A Pandas DataFrame expected to contain 'datetime', 'price_gold',
             and 'ema' columns. The DataFrame must already be filtered by the
@@ -15,56 +118,30 @@ def create_token_line_plot(df: pd.DataFrame) -> go.Figure:
     Returns:
         A Plotly Figure object configured with the line traces and layout.
     """
+    # Limit the number of points sent to and drawn by the browser
+    df = _downsample(df)
+
+    # Extract the columns once as NumPy arrays so Plotly does not coerce each
+    # Series itself; gold prices fit comfortably in 32-bit integers
+    x = df["datetime"].to_numpy()
+    y_price = df["price_gold"].to_numpy(dtype=np.int32)
+    # Records saved before the EMA column existed have no EMA; keep them as NaN
+    # so the line shows a gap instead of an integer cast of NaN
+    if df["ema"].notna().all():
+        y_ema = df["ema"].to_numpy(dtype=np.int32)
+    else:
+        y_ema = df["ema"].to_numpy(dtype=np.float64)
+
     # Initialize a new Plotly Figure object.
     line_figure = go.Figure()
 
     # Add the trace for the actual token price
-    line_figure.add_trace(
-        go.Scatter(
-            x=df["datetime"],
-            y=df["price_gold"],
-            mode="lines",
-            line=dict(color="#17B897", width=2, dash="solid"),
-            name="Actual Price",
-            # Custom hover text format
-            hovertemplate=(
-                "Date: %{x|%Y-%m-%d %H:%M:%S}<br>Price: %{y} Gold<extra></extra>"
-            ),
-        )
-    )
+    line_figure.add_trace(go.Scattergl(x=x, y=y_price, **_ACTUAL_TRACE_KW))
 
     # Add the trace for the Exponential Moving Average
-    line_figure.add_trace(
-        go.Scatter(
-            x=df["datetime"],
-            y=df["ema"],
-            mode="lines",
-            line=dict(color="#FF6347", width=2, dash="dash"),
-            name="Exponential Moving Average (7 days)",
-            # Custom hover text format
-            hovertemplate=(
-                "Date: %{x|%Y-%m-%d %H:%M:%S}<br>EMA: %{y} Gold<extra>7-Day EMA</extra>"
-            ),
-        )
-    )
+    line_figure.add_trace(go.Scattergl(x=x, y=y_ema, **_EMA_TRACE_KW))
 
     # Update the chart layout and aesthetics
-    line_figure.update_layout(
-        title={"text": "WoW Token Price Over Time", "x": 0.05, "xanchor": "left"},
-        xaxis_title="Date",
-        yaxis_title="Price (Gold)",
-        # Prevent zooming to keep the display clean
-        xaxis_fixedrange=True,
-        yaxis_fixedrange=True,
-        # Display all traces' data when hovering over a single point on the x-axis
-        hovermode="x unified",
-        margin=dict(l=40, r=20, t=50, b=40),
-        # Set background to white for a clean look
-        plot_bgcolor="#ffffff",
-        paper_bgcolor="#ffffff",
-        font={"color": "#4b5563"},
-        # Horizontal legend at the top right
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    )
+    line_figure.update_layout(**_LAYOUT_KW)
 
     return line_figure
@@ -1,5 +1,53 @@
 from dash import dcc, html
-from config import DAYS_OPTIONS, DEFAULT_DAYS_FILTER, REGION_OPTIONS, DEFAULT_REGION
+from config import (
+    COLOR_DECREASE,
+    COLOR_INCREASE,
+    DAYS_OPTIONS,
+    DEFAULT_DAYS_FILTER,
+    REGION_OPTIONS,
+    DEFAULT_REGION,
+)
+
+
+# (title, value component id, indicator component id) of each statistic card.
+# Cards without an indicator show the gold unit instead.
+STAT_CARDS: list[tuple[str, str, str | None]] = [
+    ("Current Price", "current-price-value", "price_change_indicators"),
+    ("Average Price", "average-price-value", None),
+    ("Highest Price", "highest-price-value", None),
+    ("Lowest Price", "lowest-price-value", None),
+]
+
+
+def build_stat_card(
+    title: str, value_id: str, indicator_id: str | None = None
+) -> html.Div:
+    """
+    Builds a statistic card showing a single value.
+
+    Args:
+        title: The card's title.
+        value_id: The id of the component displaying the value.
+        indicator_id: The id of the component displaying the price change
+            indicators, or None to display the gold unit instead.
+
+    Returns:
+        The html.Div element of the card.
+    """
+    if indicator_id is None:
+        footer = html.P(children="gold", className="card-unit")
+    else:
+        # Absolute and percentage price change indicators
+        footer = html.P(id=indicator_id, children="N/A", className="card-indicator")
+
+    return html.Div(
+        children=[
+            html.H3(children=title, className="card-title"),
+            html.P(id=value_id, children="N/A", className="card-value"),
+            footer,
+        ],
+        className="stat-card",
+    )
 
 
 def create_layout() -> html.Div:
@@ -17,6 +65,13 @@ def create_layout() -> html.Div:
                 children=[
                     # dcc.Store component to hold and share the loaded DataFrame data
                     dcc.Store(id="token-data-store", storage_type="memory"),
+                    # Region and database version of the data held by the store
+                    dcc.Store(id="token-data-version", storage_type="memory"),
+                    # Colors of the price change indicators, read by assets/stats.js
+                    dcc.Store(
+                        id="change-colors",
+                        data={"increase": COLOR_INCREASE, "decrease": COLOR_DECREASE},
+                    ),
                     html.H1(
                         children="World Of Warcraft Token Price",
                         className="header-title",
@@ -43,75 +98,7 @@ def create_layout() -> html.Div:
             ),
             # Statistics Card Container
             html.Div(
-                children=[
-                    # Current Price Card
-                    html.Div(
-                        children=[
-                            html.H3(children="Current Price", className="card-title"),
-                            # Value of the current price
-                            html.P(
-                                id="current-price-value",
-                                children="N/A",
-                                className="card-value",
-                            ),
-                            # Absolute and percentage price change indicators
-                            html.P(
-                                id="price_change_indicators",
-                                children="N/A",
-                                className="card-indicator",
-                            ),
-                        ],
-                        className="stat-card",
-                    ),
-                    # Average Price Card
-                    html.Div(
-                        children=[
-                            html.H3(children=("Average Price"), className="card-title"),
-                            html.P(
-                                id="average-price-value",
-                                children="N/A",
-                                className="card-value",
-                            ),
-                            html.P(
-                                children="gold",
-                                className="card-unit",
-                            ),
-                        ],
-                        className="stat-card",
-                    ),
-                    # Highest Price Card
-                    html.Div(
-                        children=[
-                            html.H3(children=("Highest Price"), className="card-title"),
-                            html.P(
-                                id="highest-price-value",
-                                children="N/A",
-                                className="card-value",
-                            ),
-                            html.P(
-                                children="gold",
-                                className="card-unit",
-                            ),
-                        ],
-                        className="stat-card",
-                    ),
-                    # Lowest Price Card
-                    html.Div(
-                        children=[
-                            html.H3(children=("Lowest Price"), className="card-title"),
-                            html.P(
-                                id="lowest-price-value",
-                                children="N/A",
-                                className="card-value",
-                            ),
-                            html.P(
-                                children="gold",
-                                className="card-unit",
-                            ),
-                        ],
-                        className="stat-card",
-                    ),
-                ],
+                children=[build_stat_card(*card) for card in STAT_CARDS],
                 className="stats-container",
             ),
             # Menu Section
@@ -164,6 +151,8 @@ def create_layout() -> html.Div:
                     dcc.Interval(
                         id="interval-check", interval=5 * 60 * 1000, n_intervals=0
                     ),
+                    # Browser-side poll pausing the auto-refresh while the tab is hidden
+                    dcc.Interval(id="visibility-poll", interval=1000),
                 ],
                 className="wrapper",
             ),
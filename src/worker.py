@@ -1,38 +1,115 @@
-import time
-import schedule
+import asyncio
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 import requests
 import logging
-from api_client import BlizzardAPIClient
-from data_manager import save_price, initialize_db
-from config import CLIENT_ID, CLIENT_SECRET, REGION_OPTIONS, LOCALE, TOKEN_CACHE_FILE
+from api_client import BlizzardAPIClient, create_session
+from data_manager import save_prices, initialize_db, optimize_db
+from config import (
+    CLIENT_ID,
+    CLIENT_SECRET,
+    REGION_OPTIONS,
+    LOCALE,
+    TOKEN_CACHE_FILE,
+    COLLECTION_INTERVAL_MINUTES,
+    MAX_CONCURRENT_REQUESTS,
+    DB_MAINTENANCE_MINUTES,
+    LOG_LEVEL,
+)
 
 # Configure logging to display timestamp, level, and message
 logging.basicConfig(
-    level=logging.INFO,
+    level=LOG_LEVEL,
     format="%(asctime)s - %(levelname)s - %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
+# Shared pool running the blocking API and database calls of all regions
+# concurrently, reusing the same threads on every run
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=len(REGION_OPTIONS), thread_name_prefix="wow-fetch"
+)
+atexit.register(EXECUTOR.shutdown, wait=False)
+
+# Caps the API fetches in flight across all regions to respect Blizzard's rate
+# limits while still overlapping them. The pool runs at most one thread per
+# region, which bounds the fetches in flight as well.
+_request_slots = asyncio.Semaphore(min(MAX_CONCURRENT_REQUESTS, len(REGION_OPTIONS)))
 
-def run_collection_job(api_client: BlizzardAPIClient):
+# Serializes the database initialization of concurrent collection jobs
+_db_init_lock = threading.Lock()
+
+
+@cache
+def get_session() -> requests.Session:
     """
-    Fetches the WoW token price for a specific region and saves it to the database.
+    Returns the HTTP session shared by the API clients of all regions, so the
+    OAuth and price requests reuse the same keep-alive connection pool.
+
+    Returns:
+        The shared requests.Session.
+    """
+    return create_session(
+        pool_connections=len(REGION_OPTIONS), pool_maxsize=2 * len(REGION_OPTIONS)
+    )
+
+
+@cache
+def get_api_client(region: str) -> BlizzardAPIClient:
+    """
+    Returns the BlizzardAPIClient of a region, creating it on first use.
+
+    Args:
+        region: The region identifier.
+
+    Returns:
+        The API client configured for the region.
+
+    Raises:
+        ValueError: If the API credentials are not configured.
+    """
+    return BlizzardAPIClient(
+        CLIENT_ID, CLIENT_SECRET, region, LOCALE, TOKEN_CACHE_FILE, get_session()
+    )
+
+
+@cache
+def _db_ready() -> bool:
+    """
+    Initializes the database structure on first use, so the schema check runs
+    once per process when the first price is saved.
+
+    Returns:
+        True once the database has been initialized.
+    """
+    with _db_init_lock:
+        initialize_db()
+    logging.info("Database initialized.")
+    return True
 
-    Handles API request errors and logs the status of the operation.
+
+async def _fetch_price(api_client: BlizzardAPIClient) -> int | None:
+    """
+    Fetches the WoW token price for a specific region.
+
+    The blocking API request runs in the worker's thread pool, so the fetches
+    of different regions overlap. Handles API request errors and logs them.
 
     Args:
         api_client: The BlizzardAPIClient instance configured for a specific region.
+
+    Returns:
+        The price in copper, or None if it could not be fetched.
     """
     region = api_client.region
     logging.info(f"Starting price collection for region: {region}")
 
     try:
         # Attempt to fetch the current price from the API
-        price = api_client.fetch_wow_token_price()
-
-        # Save the price data using the data manager, which handles metric calculation
-        save_price(price, region)
-        logging.info(f"Price saved for {region}: {price} copper.")
+        async with _request_slots:
+            return await asyncio.to_thread(api_client.fetch_wow_token_price)
 
     except requests.exceptions.RequestException as e:
         # Handle network or API-specific errors
@@ -41,18 +118,140 @@ def run_collection_job(api_client: BlizzardAPIClient):
         # Handle any other unexpected errors during the process
         logging.error(f"Unexpected error for {region}: {e}")
 
+    return None
+
+
+async def _save_prices(prices: list[tuple[int, str]]):
+    """
+    Saves fetched prices to the database in a single transaction.
+
+    The blocking database calls run in the worker's thread pool.
+
+    Args:
+        prices: A list of (price_copper, region) tuples.
+    """
+    if not prices:
+        return
+
+    try:
+        # Save the price data using the data manager; the metrics are derived
+        # by the database
+        await asyncio.to_thread(_db_ready)
+        await asyncio.to_thread(save_prices, prices)
+        for price, region in prices:
+            logging.info(f"Price saved for {region}: {price} copper.")
+
+    except Exception as e:
+        # Handle any unexpected database setup errors
+        logging.error(f"Unexpected error saving prices: {e}")
+
+
+async def run_collection_job(api_client: BlizzardAPIClient):
+    """
+    Fetches the WoW token price for a specific region and saves it to the database.
+
+    Args:
+        api_client: The BlizzardAPIClient instance configured for a specific region.
+    """
+    price = await _fetch_price(api_client)
+    if price is not None:
+        await _save_prices([(price, api_client.region)])
+
+
+async def _ticks(interval: float, offset: float = 0):
+    """
+    Yields once per interval, sleeping until each deadline on the event loop's
+    monotonic clock.
+
+    Deadlines are computed from the start time rather than from the end of the
+    previous run, so the time spent running a job does not make the schedule
+    drift, and the loop only wakes when a run is due.
+
+    Args:
+        interval: Time between runs in seconds.
+        offset: Extra delay in seconds before the first run.
+
+    Yields:
+        The number of the run, starting at 1.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + offset
+    run = 0
+
+    while True:
+        run += 1
+        deadline += interval
+        # Coalesce the runs missed while a job overran into a single run
+        while deadline + interval <= loop.time():
+            deadline += interval
+        await asyncio.sleep(max(deadline - loop.time(), 0))
+        yield run
+
+
+async def _collect_periodically(api_client: BlizzardAPIClient, offset: float):
+    """
+    Runs the collection job of a region every `COLLECTION_INTERVAL_MINUTES`.
+
+    Args:
+        api_client: The BlizzardAPIClient instance configured for a specific region.
+        offset: Delay in seconds before the region's periodic runs begin, used to
+            spread the regions over the interval.
+    """
+    async for _ in _ticks(COLLECTION_INTERVAL_MINUTES * 60, offset):
+        await run_collection_job(api_client)
+
+
+async def _maintain_db_periodically():
+    """
+    Keeps planner statistics fresh and the WAL file bounded by running the
+    database maintenance every `DB_MAINTENANCE_MINUTES`.
+    """
+    async for _ in _ticks(DB_MAINTENANCE_MINUTES * 60):
+        await asyncio.to_thread(optimize_db)
+
+
+async def _run(api_clients: dict[str, BlizzardAPIClient]):
+    """
+    Runs the initial collection for every region concurrently, then keeps the
+    periodic collection and maintenance tasks running.
+
+    Args:
+        api_clients: The API clients keyed by region.
+    """
+    # Run the blocking calls of asyncio.to_thread on the shared pool
+    asyncio.get_running_loop().set_default_executor(EXECUTOR)
+
+    # Fetch every region immediately to populate the database on startup
+    clients = list(api_clients.values())
+    prices = await asyncio.gather(*(_fetch_price(c) for c in clients))
+    # Write the prices of all regions at once, in a single transaction
+    await _save_prices(
+        [(price, c.region) for price, c in zip(prices, clients) if price is not None]
+    )
+
+    logging.info("Scheduler started. Waiting for tasks...")
+
+    # Stagger the regions evenly across the interval instead of firing all of
+    # their requests at the same moment
+    stagger_seconds = COLLECTION_INTERVAL_MINUTES * 60 / max(len(api_clients), 1)
+
+    await asyncio.gather(
+        *(
+            _collect_periodically(client, i * stagger_seconds)
+            for i, client in enumerate(api_clients.values())
+        ),
+        _maintain_db_periodically(),
+    )
+
 
 def start_worker():
     """
     Main entry point for the worker process.
 
-    Initializes the database, creates a BlizzardAPIClient for each configured region,
-    schedules the collection job to run periodically, and enters the main execution loop.
+    Creates a BlizzardAPIClient for each configured region and runs the collection
+    jobs on an asyncio event loop. The database is initialized lazily by the first
+    collection job.
     """
-    # Initialize the database structure if it doesn't exist
-    initialize_db()
-    logging.info("Database initialized.")
-
     api_clients = {}
 
     # Iterate through all configured regions to set up API clients
@@ -60,35 +259,13 @@ def start_worker():
         region = region_option["value"]
         try:
             # Initialize the Blizzard API client with credentials and config
-            client = BlizzardAPIClient(
-                CLIENT_ID, CLIENT_SECRET, region, LOCALE, TOKEN_CACHE_FILE
-            )
+            client = get_api_client(region)
             api_clients[region] = client
             logging.info(f"Client initialized for region: {region}")
         except ValueError as e:
             logging.error(f"Failed to initialize client for {region}: {e}")
 
-    # Schedule jobs for all successfully initialized clients
-    for client in api_clients.values():
-        # Run the job immediately to populate the database on startup
-        run_collection_job(client)
-
-        # Schedule the job to run every 20 minutes for continuous data collection
-        schedule.every(20).minutes.do(run_collection_job, api_client=client)
-
-    logging.info("Scheduler started. Waiting for tasks...")
-
-    # Main application loop that checks and runs scheduled jobs
-    while True:
-        try:
-            # Check and run any pending scheduled tasks
-            schedule.run_pending()
-        except Exception as e:
-            # Catch critical errors to prevent the worker from crashing completely
-            logging.critical(f"CRITICAL SCHEDULER ERROR: {e}")
-
-        # Sleep briefly to prevent high CPU usage while waiting for the next scheduled run
-        time.sleep(1)
+    asyncio.run(_run(api_clients))
 
 
 if __name__ == "__main__":
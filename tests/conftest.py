@@ -0,0 +1,16 @@
+import pytest
+import threading
+import data_manager
+
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_manager, "DB_PATH", tmp_path / "test.db")
+    monkeypatch.setattr(data_manager, "_local", threading.local())
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def temp_db(empty_db):
+    data_manager.initialize_db()
+    return empty_db
@@ -0,0 +1,39 @@
+import json
+import time
+from unittest.mock import patch
+from src.api_client import BlizzardAPIClient
+
+
+def _client(tmp_path):
+    return BlizzardAPIClient(
+        "id", "secret", "eu", "en_US", tmp_path / "token_cache.json"
+    )
+
+
+def test_saved_token_is_reused_without_requests(tmp_path):
+    _client(tmp_path)._save_token_cache("cached-token", 3600)
+
+    client = _client(tmp_path)
+    with patch.object(client.session, "post") as mock_post:
+        assert client.get_access_token() == "cached-token"
+        assert client.get_access_token() == "cached-token"
+
+    mock_post.assert_not_called()
+    assert not (tmp_path / "token_cache_eu.tmp").exists()
+
+
+def test_token_close_to_expiry_is_renewed(tmp_path):
+    cache_file = tmp_path / "token_cache_eu.json"
+    cache_file.write_text(
+        json.dumps({"access_token": "old-token", "expiry": time.time() + 30})
+    )
+
+    client = _client(tmp_path)
+    with patch.object(client.session, "post") as mock_post:
+        mock_post.return_value.json.return_value = {
+            "access_token": "new-token",
+            "expires_in": 86400,
+        }
+        assert client.get_access_token() == "new-token"
+
+    assert json.loads(cache_file.read_text())["access_token"] == "new-token"
@@ -1,27 +1,11 @@
 import pytest
 import pandas as pd
-from dash import html
-from src.callbacks import _format_price_change_indicators, _filter_dataframe_by_days
-
-def test_format_price_change_indicators_positive():
-    abs_change = 5000
-    pct_change = 2.5
-
-    result = _format_price_change_indicators(abs_change, pct_change)
-
-    assert "+" in result[1].children
-    assert "2.50%" in result[1].children
-    assert result[1].style["color"] == "#17B897"
-
-def test_format_price_change_indicators_negative():
-    abs_change = -3000
-    pct_change = -1.5
-
-    result = _format_price_change_indicators(abs_change, pct_change)
-
-    assert "-" in result[1].children
-    assert "-1.50%" in result[1].children
-    assert result[1].style["color"] == "#FF6347"
+from unittest.mock import patch
+from cachelib import SimpleCache
+from src.callbacks import (
+    _filter_dataframe_by_days,
+    _get_token_line_plot,
+)
 
 def test_filter_dataframe_by_days():
     df = pd.DataFrame({
@@ -32,5 +16,48 @@ def test_filter_dataframe_by_days():
     filtered_df = _filter_dataframe_by_days(df, 7)
 
     assert len(filtered_df) == 2
-    assert "2023-01-01" not in filtered_df["datetime"].values.astype(str)
+    assert not (filtered_df["datetime"] == pd.Timestamp("2023-01-01")).any()
 
+def test_token_line_plot_is_cached_until_new_record():
+    cache = SimpleCache()
+    df = pd.DataFrame({
+        "id": [1, 2],
+        "datetime": pd.to_datetime(["2023-01-01 00:00:00", "2023-01-01 00:20:00"]),
+        "price_gold": [100, 110],
+        "ema": [100, 102],
+    })
+
+    first = _get_token_line_plot(df, 3, cache)
+    with patch("src.callbacks.create_token_line_plot") as mock_plot:
+        second = _get_token_line_plot(df, 3, cache)
+        _get_token_line_plot(df.assign(id=[2, 3]), 3, cache)
+
+    assert second["layout"] == first["layout"]
+    assert mock_plot.call_count == 1
+
+def test_token_line_plot_is_rebuilt_after_backfill():
+    cache = SimpleCache()
+    df = pd.DataFrame({
+        "id": [1, 2],
+        "datetime": pd.to_datetime(["2023-01-01 00:20:00", "2023-01-01 00:40:00"]),
+        "price_gold": [100, 110],
+        "ema": [100, 102],
+    })
+    backfilled = pd.concat(
+        [
+            pd.DataFrame({
+                "id": [3],
+                "datetime": pd.to_datetime(["2023-01-01 00:00:00"]),
+                "price_gold": [90],
+                "ema": [90],
+            }),
+            df,
+        ],
+        ignore_index=True,
+    )
+
+    _get_token_line_plot(df, 3, cache)
+    with patch("src.callbacks.create_token_line_plot") as mock_plot:
+        _get_token_line_plot(backfilled, 3, cache)
+
+    assert mock_plot.call_count == 1
@@ -0,0 +1,52 @@
+import pytest
+import data_handler
+from data_manager import bulk_save_prices
+
+
+@pytest.fixture
+def handler_db(temp_db, monkeypatch):
+    monkeypatch.setattr(data_handler, "DB_PATH", temp_db)
+    monkeypatch.setattr(data_handler, "_history", {})
+    return temp_db
+
+
+def test_reload_appends_new_records_and_trims_window(handler_db):
+
+    bulk_save_prices(
+        [
+            ("2024-01-01 00:00:00", 100000 * 10000, "eu"),
+            ("2024-01-10 00:00:00", 110000 * 10000, "eu"),
+        ]
+    )
+    first = data_handler._load_from_db(1.0, "eu")
+
+    bulk_save_prices(
+        [
+            ("2024-01-20 00:00:00", 120000 * 10000, "eu"),
+            ("2024-01-20 00:00:00", 200000 * 10000, "us"),
+        ]
+    )
+    second = data_handler._load_from_db(2.0, "eu")
+
+    assert list(first["price_gold"]) == [100000, 110000]
+    assert list(second["price_gold"]) == [110000, 120000]
+    assert list(second.index) == [0, 1]
+
+
+def test_reload_after_backfill_reads_updated_metrics(handler_db):
+
+    bulk_save_prices(
+        [
+            ("2024-01-10 00:00:00", 110000 * 10000, "eu"),
+            ("2024-01-11 00:00:00", 120000 * 10000, "eu"),
+        ]
+    )
+    first = data_handler._load_from_db(1.0, "eu")
+
+    bulk_save_prices([("2024-01-09 00:00:00", 50000 * 10000, "eu")])
+    second = data_handler._load_from_db(2.0, "eu")
+
+    assert list(first["ema"]) == [110000, 112500]
+    assert list(second["price_gold"]) == [50000, 110000, 120000]
+    assert list(second["ema"]) == [50000, 65000, 78750]
+    assert list(second["price_change_abs"]) == [0, 60000, 10000]
@@ -1,20 +1,244 @@
+import gc
+import os
 import pytest
-from unittest.mock import MagicMock, patch
-from src.data_manager import save_price
+import pandas as pd
+import sqlite3
+import threading
+import data_manager
+from data_manager import (
+    bulk_save_prices,
+    get_latest_datetime,
+    initialize_db,
+    load_range,
+    save_price,
+    save_prices,
+)
 
-@patch("src.data_manager.get_db_connection")
-def test_ema_calculation_logic(mock_get_conn):
 
-    mock_conn = MagicMock()
-    mock_cursor = mock_conn.cursor.return_value
-    mock_get_conn.return_value.__enter__.return_value = mock_conn
+def _fetch_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            """SELECT price_gold, ema, price_change_abs, price_change_pct
+               FROM token_prices ORDER BY id"""
+        ).fetchall()
 
-    mock_cursor.fetchone.return_value = (100000, 100000.0)
 
+def test_save_price_timestamps_record_in_utc(temp_db):
+
+    save_price(100000 * 10000, "eu")
+
+    with sqlite3.connect(temp_db) as conn:
+        (datetime,) = conn.execute("SELECT datetime FROM token_prices").fetchone()
+    saved_at = pd.Timestamp(datetime, tz="UTC")
+    assert abs(pd.Timestamp.now(tz="UTC") - saved_at) < pd.Timedelta(minutes=1)
+
+
+def test_first_record_seeds_metrics(temp_db):
+
+    save_price(100000 * 10000, "eu")
+
+    assert _fetch_rows(temp_db) == [(100000, 100000, 0, 0)]
+
+
+def test_ema_calculation_logic(temp_db):
+
+    save_price(100000 * 10000, "eu")
     save_price(110000 * 10000, "eu")
 
-    args, _ = mock_cursor.execute.call_args_list[-1]
-    inserted_values = args[1]
+    inserted_values = _fetch_rows(temp_db)[-1]
+
+    assert inserted_values[1] == 102500
+    assert inserted_values[2] == 10000
+    assert inserted_values[3] == 1000
+
+
+def test_unchanged_price_is_saved_again(temp_db):
+
+    save_price(100000 * 10000, "eu")
+    save_price(100000 * 10000, "eu")
+
+    assert _fetch_rows(temp_db) == [(100000, 100000, 0, 0)] * 2
+
+
+def test_save_prices_writes_all_regions(temp_db):
+
+    save_price(100000 * 10000, "eu")
+    save_prices([(110000 * 10000, "eu"), (200000 * 10000, "us")])
+
+    assert _fetch_rows(temp_db) == [
+        (100000, 100000, 0, 0),
+        (110000, 102500, 10000, 1000),
+        (200000, 200000, 0, 0),
+    ]
+
+
+def test_metrics_are_computed_per_region(temp_db):
+
+    save_price(100000 * 10000, "eu")
+    save_price(200000 * 10000, "us")
+
+    assert _fetch_rows(temp_db)[-1] == (200000, 200000, 0, 0)
+
+
+def test_bulk_save_matches_single_saves(temp_db):
+
+    bulk_save_prices(
+        [
+            ("2024-01-01 00:20:00", 110000 * 10000, "eu"),
+            ("2024-01-01 00:00:00", 100000 * 10000, "eu"),
+        ]
+    )
+
+    assert _fetch_rows(temp_db) == [
+        (100000, 100000, 0, 0),
+        (110000, 102500, 10000, 1000),
+    ]
+
+
+def test_bulk_save_continues_from_last_record(temp_db):
+
+    save_price(100000 * 10000, "eu")
+    bulk_save_prices([("2999-01-01 00:00:00", 110000 * 10000, "eu")])
+
+    assert _fetch_rows(temp_db)[-1] == (110000, 102500, 10000, 1000)
+
+
+def test_bulk_save_of_older_records_updates_following_records(temp_db):
+
+    bulk_save_prices([("2024-01-01 00:20:00", 110000 * 10000, "eu")])
+    bulk_save_prices([("2024-01-01 00:00:00", 100000 * 10000, "eu")])
+
+    rows = _fetch_rows(temp_db)
+    assert sorted(rows) == [
+        (100000, 100000, 0, 0),
+        (110000, 102500, 10000, 1000),
+    ]
+
+
+def test_bulk_save_spans_multiple_insert_chunks(temp_db):
+
+    timestamps = pd.date_range("2024-01-01", periods=600, freq="20min")
+    bulk_save_prices(
+        [(ts.strftime("%Y-%m-%d %H:%M:%S"), 100000 * 10000, "eu") for ts in timestamps]
+    )
+
+    rows = _fetch_rows(temp_db)
+    assert len(rows) == 600
+    assert rows[-1] == (100000, 100000, 0, 0)
+
+
+def test_trigger_derives_metrics_of_plain_inserts(temp_db):
+
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute(
+            """INSERT INTO token_prices (datetime, price_gold, region) VALUES
+               ('2024-01-01 00:00:00', 100000, 'eu'),
+               ('2024-01-01 00:00:00', 200000, 'us'),
+               ('2024-01-01 00:20:00', 90000, 'eu')"""
+        )
+
+    assert _fetch_rows(temp_db) == [
+        (100000, 100000, 0, 0),
+        (200000, 200000, 0, 0),
+        (90000, 97500, -10000, -1000),
+    ]
+
+
+def test_initialize_db_records_schema_version(temp_db):
+
+    initialize_db()
+
+    with sqlite3.connect(temp_db) as conn:
+        (user_version,) = conn.execute("PRAGMA user_version").fetchone()
+
+    assert user_version == data_manager.SCHEMA_VERSION
+
+
+def test_last_record_lookup_uses_covering_index(temp_db):
+
+    with sqlite3.connect(temp_db) as conn:
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN
+               SELECT price_gold, ema FROM token_prices
+               WHERE region = ? ORDER BY datetime DESC LIMIT 1""",
+            ("eu",),
+        ).fetchall()
+
+    assert "USING COVERING INDEX idx_region_date_cover" in plan[0][3]
+
+
+def test_load_range_filters_in_sql(temp_db):
+
+    bulk_save_prices(
+        [
+            ("2024-01-01 00:00:00", 100000 * 10000, "eu"),
+            ("2024-01-05 00:00:00", 110000 * 10000, "eu"),
+            ("2024-01-10 00:00:00", 120000 * 10000, "eu"),
+            ("2024-01-10 00:00:00", 200000 * 10000, "us"),
+        ]
+    )
+
+    df = load_range("eu", "2024-01-03 00:00:00", get_latest_datetime("eu"))
+
+    assert list(df["price_gold"]) == [110000, 120000]
+    assert list(df["price_change_pct"]) == [10.0, 9.09]
+    assert pd.api.types.is_datetime64_any_dtype(df["datetime"])
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_reads_from_short_lived_threads_close_their_connections(temp_db):
+
+    bulk_save_prices([("2024-01-01 00:00:00", 100000 * 10000, "eu")])
+    window = ("eu", "2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    load_range(*window)
+    # Close connections left unreferenced by earlier tests before counting
+    gc.collect()
+    open_fds = len(os.listdir("/proc/self/fd"))
+
+    for _ in range(20):
+        thread = threading.Thread(target=load_range, args=window)
+        thread.start()
+        thread.join()
+
+    assert len(os.listdir("/proc/self/fd")) == open_fds
+
+
+def test_optimize_db_truncates_large_wal(temp_db, monkeypatch):
+    monkeypatch.setattr(data_manager, "WAL_TRUNCATE_FRAMES", 0)
+
+    save_price(100000 * 10000, "eu")
+    data_manager.optimize_db()
+
+    assert (temp_db.parent / "test.db-wal").stat().st_size == 0
+
+
+def test_initialize_db_converts_legacy_percentages(empty_db):
+    with sqlite3.connect(empty_db) as conn:
+        conn.execute("""
+            CREATE TABLE token_prices (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                datetime TEXT NOT NULL,
+                price_gold INTEGER NOT NULL,
+                region TEXT NOT NULL,
+                ema INTEGER,
+                price_change_abs INTEGER,
+                price_change_pct REAL
+            )
+        """)
+        conn.execute(
+            """INSERT INTO token_prices VALUES
+               (7, '2024-01-01 00:00:00', 110000, 'eu', 102500, 10000, 9.0909)"""
+        )
+
+    initialize_db()
+    # The legacy 'datetime' column has no default value
+    save_price(110000 * 10000, "eu")
 
-    assert inserted_values[3] == 102500
-    assert inserted_values[4] == 10000
\ No newline at end of file
+    assert _fetch_rows(empty_db) == [
+        (110000, 102500, 10000, 909),
+        (110000, 104375, 0, 0),
+    ]
+    with sqlite3.connect(empty_db) as conn:
+        table_info = conn.execute("PRAGMA table_info(token_prices)").fetchall()
+    columns = {info[1]: info[2] for info in table_info}
+    assert columns["price_change_pct"] == "INTEGER"
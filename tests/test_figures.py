@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from src.figures import _downsample, create_token_line_plot
+
+
+def _price_frame(n_rows):
+    return pd.DataFrame(
+        {
+            "datetime": pd.date_range("2024-01-01", periods=n_rows, freq="20min"),
+            "price_gold": np.arange(n_rows) % 97 * 1000 + 200000,
+            "ema": np.full(n_rows, 200000),
+        }
+    )
+
+
+def test_downsample_keeps_small_frames_untouched():
+    df = _price_frame(100)
+
+    assert _downsample(df, 200) is df
+
+
+def test_downsample_keeps_endpoints_and_extremes():
+    df = _price_frame(5000)
+    df.loc[2500, "price_gold"] = 999999
+
+    result = _downsample(df, 500)
+
+    assert len(result) == 500
+    assert result["datetime"].is_monotonic_increasing
+    assert result.index[0] == 0 and result.index[-1] == 4999
+    assert 999999 in result["price_gold"].values
+
+
+def test_token_line_plot_uses_webgl_traces():
+    fig = create_token_line_plot(_price_frame(10))
+
+    assert [trace.type for trace in fig.data] == ["scattergl", "scattergl"]
+
+
+def test_token_line_plot_sends_int32_prices():
+    fig = create_token_line_plot(_price_frame(10))
+
+    assert all(trace.y.dtype == np.int32 for trace in fig.data)
+
+
+def test_token_line_plot_keeps_missing_ema_as_gap():
+    df = _price_frame(2).assign(ema=[np.nan, 102500])
+
+    fig = create_token_line_plot(df)
+
+    assert np.isnan(fig.data[1].y[0])
+    assert fig.data[1].y[1] == 102500
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+import pytest
+
+STATS_JS = Path(__file__).resolve().parent.parent / "assets" / "stats.js"
+COLORS = {"increase": "green", "decrease": "red"}
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+
+def _compute(data, days_filter):
+    # Load the asset into a bare 'window' and print the callback's result
+    args = json.dumps([data, days_filter, COLORS])
+    script = f"""
+        globalThis.window = {{}};
+        const source = require("fs").readFileSync({json.dumps(str(STATS_JS))}, "utf8");
+        require("vm").runInThisContext(source);
+        const result = window.dash_clientside.stats.compute(...{args});
+        console.log(JSON.stringify(result));
+    """
+    # Run in a time zone with daylight saving time to catch local-time parsing
+    env = {**os.environ, "TZ": "Europe/Madrid"}
+    output = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output)
+
+
+def _children(indicators):
+    return [span["props"]["children"] for span in indicators]
+
+
+def test_compute_statistics_of_days_window():
+    data = {
+        "datetime": [
+            "2024-01-01T00:00:00",
+            "2024-01-05T00:00:00",
+            "2024-01-07T23:00:00",
+            "2024-01-08T00:00:00",
+        ],
+        "price_gold": [500000, 100000, 120000, 110000],
+        "price_change_abs": [0, -400000, 20000, -10000],
+        "price_change_pct": [0, -80.0, 20.0, -8.33],
+    }
+
+    result = _compute(data, 3)
+
+    assert result[:5] == [
+        "Last updated: 2024-01-08 00:00:00",
+        "110,000",
+        "110,000",
+        "120,000",
+        "100,000",
+    ]
+    assert _children(result[5]) == ["-10,000 Gold", "(-8.33%)"]
+
+
+def test_compute_window_boundary_is_parsed_as_utc():
+    data = {
+        # Daylight saving time ends in between
+        "datetime": ["2024-10-25T12:00:00", "2024-10-28T12:00:00"],
+        "price_gold": [100000, 200000],
+        "price_change_abs": [0, 100000],
+        "price_change_pct": [0, 100.0],
+    }
+
+    # Exactly three days apart, so the boundary record is included
+    assert _compute(data, 3)[2] == "150,000"
+
+
+def test_compute_handles_missing_percentage_change():
+    data = {
+        "datetime": ["2024-01-01T00:00:00"],
+        "price_gold": [100000],
+        "price_change_abs": [0],
+        "price_change_pct": [None],
+    }
+
+    assert _children(_compute(data, 0)[5]) == ["+0 Gold", "(N/A)"]
+
+
+def test_compute_without_data():
+    assert _compute({}, 3)[:5] == ["N/A"] * 5